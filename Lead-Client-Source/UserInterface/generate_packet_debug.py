@@ -9,16 +9,25 @@ Parses packet.h and generates PacketDebugRegGen.h with:
 
 Usage:
     python generate_packet_debug.py
+    ./generate_packet_debug.sh      (uses pypy3 when installed)
 
 This will read Lead-Shared-Source/packet.h and generate PacketDebugRegGen.h
 """
 
 import re
 import os
+from functools import lru_cache
+from operator import itemgetter
 
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-PACKET_H_PATH = os.path.join(SCRIPT_DIR, "..", "..", "Lead-Shared-Source", "packet.h")
-OUTPUT_PATH = os.path.join(SCRIPT_DIR, "PacketDebugRegGen.h")
+# Pre-compiled patterns (avoid re-lookup in the hot loops)
+_HEADER_RE = re.compile(r'\b(HEADER_(?:CG|GC)_\w+)\s*=\s*(0x[0-9a-fA-F]+|\d+)')
+# Match multi-word types like "unsigned char", "unsigned long", "signed int"
+# Pattern: (type_modifier? type_name *?) field_name [array]? [array2]? ;
+_FIELD_RE = re.compile(r'((?:unsigned\s+|signed\s+)?(?:long\s+)?(?:\w+)(?:\s*\*)?)\s+(\w+)(?:\s*\[\s*(\w+|\d+)\s*\])?(?:\s*\[\s*(\w+|\d+)\s*\])?;')
+_TYPEDEF_ALIAS_RE = re.compile(r'typedef\s+((?:T|S)Packet\w+)\s+((?:T|S)Packet\w+)\s*;')
+# Either "typedef struct [tag] {" (groups 1-2) or "struct SPacketXXX {" (group 3)
+_ANY_STRUCT_START_RE = re.compile(r'(?:(typedef)\s+struct\s+(?:(\w+)\s*)?|struct\s+((?:T|S)Packet\w+)\s*)\{')
+_STRUCT_NAME_AFTER_BRACE_RE = re.compile(r'\s*((?:T|S)Packet\w+)\s*;')
 
 # Map C types to printf format specifiers
 TYPE_FORMAT = {
@@ -47,6 +56,30 @@ TYPE_FORMAT = {
     'time_t': ('lld', '%lld'),
 }
 
+# Precomputed per-type printer fragments: C type -> (format, argument template)
+_TYPE_RENDER = {
+    ctype: (fmt_str.replace("'", ""), '(long long)p.{name}' if ctype == 'time_t' else 'p.{name}')
+    for ctype, (_, fmt_str) in TYPE_FORMAT.items()
+}
+
+# Field names treated as the packet header byte
+_HEADER_FIELD_NAMES = frozenset({'header', 'bheader', 'cheader'})
+
+# A field with one of these names and types marks a variable-size packet
+_SIZE_FIELD_NAMES = frozenset({'size', 'wSize', 'Size'})
+_SIZE_FIELD_TYPES = frozenset({'WORD', 'DWORD', 'uint16_t'})
+
+# Keywords the field regex can mistake for a type ("struct { ... } x;")
+_SKIP_META_TYPES = frozenset({'struct', 'union', 'enum'})
+
+# Nested struct types printed as an opaque "(struct)" marker
+_OPAQUE_STRUCT_TYPES = frozenset({
+    'TItemPos', 'TQuickslot', 'TSimplePlayer', 'TPlayerSkill',
+    'TPlayerItemAttribute', 'TRefineMaterial', 'TEquipmentItemSet',
+    'TPacketAffectElement', 'TShopItemData', 'packet_shop_item',
+    'TLandPacketElement', 'TNPCPosition', 'TSubPacketShopTab',
+})
+
 # Header-to-struct alias mapping for misnamed packets
 # Maps: HEADER_XXX -> actual struct name in packet.h
 HEADER_STRUCT_ALIASES = {
@@ -85,50 +118,70 @@ HEADER_STRUCT_ALIASES = {
     "HEADER_GC_REQUEST_MAKE_GUILD": "TPacketGCGuild",
 }
 
+def _strip_comments(content):
+    """Remove // and /* */ comments in one left-to-right str.find scan"""
+    parts = []
+    pos = 0
+    line_at = content.find('//')
+    block_at = content.find('/*')
+    
+    while line_at != -1 or block_at != -1:
+        if block_at == -1 or (line_at != -1 and line_at < block_at):
+            # Line comment: drop up to (not including) the newline
+            parts.append(content[pos:line_at])
+            end = content.find('\n', line_at + 2)
+            if end == -1:
+                return ''.join(parts)
+            pos = end
+        else:
+            # Block comment: replace with a space so tokens stay separated
+            parts.append(content[pos:block_at])
+            end = content.find('*/', block_at + 2)
+            if end == -1:
+                return ''.join(parts)
+            parts.append(' ')
+            pos = end + 2
+        
+        # Only re-scan for markers that were swallowed by this comment
+        if line_at != -1 and line_at < pos:
+            line_at = content.find('//', pos)
+        if block_at != -1 and block_at < pos:
+            block_at = content.find('/*', pos)
+    
+    parts.append(content[pos:])
+    return ''.join(parts)
+
 def parse_packet_headers(content):
-    """Extract HEADER_CG_* and HEADER_GC_* definitions (skip commented ones)"""
+    """Extract HEADER_CG_* and HEADER_GC_* definitions (expects comment-free content)"""
     headers = {}
     
-    # Process line by line to skip commented lines
-    for line in content.split('\n'):
-        stripped = line.strip()
-        if stripped.startswith('//'):
-            continue
-        
-        if '//' in line:
-            line = line[:line.index('//')]
-        
-        pattern = r'\b(HEADER_(?:CG|GC)_\w+)\s*=\s*(0x[0-9a-fA-F]+|\d+)'
-        match = re.search(pattern, line)
-        if match:
-            name = match.group(1)
-            value = match.group(2)
-            if value.startswith('0x'):
-                value = int(value, 16)
-            else:
-                value = int(value)
-            headers[name] = value
+    # One regex pass over the whole buffer instead of splitting into lines.
+    # Every HEADER_* on a line is picked up (not just the first), and
+    # "NAME =\n VALUE" split across lines is accepted as well.
+    for match in _HEADER_RE.finditer(content):
+        value = match.group(2)
+        if value.startswith('0x'):
+            headers[match.group(1)] = int(value, 16)
+        else:
+            headers[match.group(1)] = int(value)
     
     return headers
 
 def parse_struct_fields(struct_body):
-    """Parse fields from a struct body"""
-    fields = []
-    
-    struct_body = re.sub(r'//.*', '', struct_body)
-    struct_body = re.sub(r'/\*.*?\*/', '', struct_body, flags=re.DOTALL)
+    """Parse fields from a struct body (already comment-free)"""
+    # Every field declaration ends with ';' - nothing to scan otherwise
+    if ';' not in struct_body:
+        return []
     
-    # Match multi-word types like "unsigned char", "unsigned long", "signed int"
-    # Pattern: (type_modifier? type_name *?) field_name [array]? [array2]? ;
-    pattern = r'((?:unsigned\s+|signed\s+)?(?:long\s+)?(?:\w+)(?:\s*\*)?)\s+(\w+)(?:\s*\[\s*(\w+|\d+)\s*\])?(?:\s*\[\s*(\w+|\d+)\s*\])?;'
+    fields = []
     
-    for match in re.finditer(pattern, struct_body):
+    for match in _FIELD_RE.finditer(struct_body):
         field_type = ' '.join(match.group(1).split())  # Normalize whitespace
         field_name = match.group(2).strip()
         array_size1 = match.group(3)
         array_size2 = match.group(4)
         
-        if field_type in ['struct', 'union', 'enum']:
+        if field_type in _SKIP_META_TYPES:
             continue
         if '*' in field_type and field_type != 'char*':
             continue
@@ -146,7 +199,7 @@ def is_header_only_struct(fields):
     """Check if struct only has a header field"""
     if len(fields) == 1:
         fname = fields[0]['name'].lower()
-        if fname in ['header', 'bheader', 'cheader']:
+        if fname in _HEADER_FIELD_NAMES:
             return True
     return False
 
@@ -155,76 +208,69 @@ def extract_balanced_braces(content, start_pos):
     if content[start_pos] != '{':
         return None, start_pos
     
-    depth = 0
-    i = start_pos
-    while i < len(content):
-        if content[i] == '{':
+    # Jump between braces with str.find instead of walking every character
+    depth = 1
+    i = start_pos + 1
+    while True:
+        next_close = content.find('}', i)
+        if next_close == -1:
+            return None, start_pos
+        next_open = content.find('{', i, next_close)
+        if next_open != -1:
             depth += 1
-        elif content[i] == '}':
+            i = next_open + 1
+        else:
             depth -= 1
             if depth == 0:
-                return content[start_pos+1:i], i
-        i += 1
-    return None, start_pos
+                return content[start_pos+1:next_close], next_close
+            i = next_close + 1
 
 def parse_packet_structs(content):
-    """Extract packet struct definitions with their fields"""
+    """Extract packet struct definitions with their fields (expects comment-free content)"""
     structs = {}
     
-    content_no_comments = re.sub(r'//[^\n]*', '', content)
-    content_no_comments = re.sub(r'/\*.*?\*/', '', content_no_comments, flags=re.DOTALL)
-    
     # First pass: parse typedef aliases (e.g., typedef TPacketX TPacketY;)
-    alias_pattern = r'typedef\s+((?:T|S)Packet\w+)\s+((?:T|S)Packet\w+)\s*;'
     aliases = {}
-    for match in re.finditer(alias_pattern, content_no_comments):
+    for match in _TYPEDEF_ALIAS_RE.finditer(content):
         source = match.group(1)
         alias = match.group(2)
         aliases[alias] = source
     
-    # Pattern 1: typedef struct name { ... } TPacketXXX;
-    # Use balanced brace extraction for complex bodies
-    pattern1_start = r'typedef\s+struct\s+(?:\w+\s*)?\{'
-    
-    for match in re.finditer(pattern1_start, content_no_comments):
+    # Single pass over both struct forms (balanced brace extraction for complex bodies):
+    #   typedef struct name { ... } TPacketXXX;
+    #   struct SPacketXXX { ... };  (non-typedef)
+    # A typedef'd name always wins; a struct tag is only used if not yet known
+    for match in _ANY_STRUCT_START_RE.finditer(content):
         brace_start = match.end() - 1
-        struct_body, end_pos = extract_balanced_braces(content_no_comments, brace_start)
+        struct_body, end_pos = extract_balanced_braces(content, brace_start)
         if struct_body is None:
             continue
         
-        # Find the struct name after the closing brace
-        after_brace = content_no_comments[end_pos+1:end_pos+100]
-        name_match = re.match(r'\s*((?:T|S)Packet\w+)\s*;', after_brace)
-        if not name_match:
-            continue
-        
-        struct_name = name_match.group(1)
         fields = parse_struct_fields(struct_body)
-        if fields:
-            structs[struct_name] = {
-                'fields': fields,
-                'header_only': is_header_only_struct(fields)
-            }
-    
-    # Pattern 2: struct SPacketXXX { ... };  (non-typedef)
-    pattern2_start = r'struct\s+((?:T|S)Packet\w+)\s*\{'
-    
-    for match in re.finditer(pattern2_start, content_no_comments):
-        struct_name = match.group(1)
-        if struct_name in structs:
+        if not fields:
             continue
+        struct_info = {
+            'fields': fields,
+            'header_only': is_header_only_struct(fields),
+            'body': ' '.join(struct_body.split())
+        }
+        
+        if match.group(1):
+            # Find the struct name after the closing brace
+            after_brace = content[end_pos+1:end_pos+100]
+            name_match = _STRUCT_NAME_AFTER_BRACE_RE.match(after_brace)
+            if name_match:
+                structs[name_match.group(1)] = struct_info
             
-        brace_start = match.end() - 1
-        struct_body, end_pos = extract_balanced_braces(content_no_comments, brace_start)
-        if struct_body is None:
-            continue
+            # typedef struct SPacketXXX { ... } also declares the tag itself
+            struct_name = match.group(2)
+            if not struct_name or not struct_name.startswith(('TPacket', 'SPacket')):
+                continue
+        else:
+            struct_name = match.group(3)
         
-        fields = parse_struct_fields(struct_body)
-        if fields:
-            structs[struct_name] = {
-                'fields': fields,
-                'header_only': is_header_only_struct(fields)
-            }
+        if struct_name not in structs:
+            structs[struct_name] = struct_info
     
     for alias, source in aliases.items():
         if source in structs and alias not in structs:
@@ -232,13 +278,14 @@ def parse_packet_structs(content):
     
     return structs
 
+@lru_cache(maxsize=None)
 def convert_to_camelcase(suffix):
     """Convert HEADER suffix to simple CamelCase: CHARACTER_ADD -> CharacterAdd"""
     parts = suffix.split('_')
     return ''.join(p.capitalize() for p in parts)
 
 # Packets that truly have no struct definition (dynamic, deprecated, or no data)
-NO_STRUCT_PACKETS = {
+NO_STRUCT_PACKETS = frozenset({
     "HEADER_CG_MALL_CHECKOUT",      # Uses dynamic/subheader system
     "HEADER_CG_DUNGEON",            # No separate CG struct, uses GC
     "HEADER_CG_TIME_SYNC",          # Internal/handshake
@@ -254,7 +301,7 @@ NO_STRUCT_PACKETS = {
     "HEADER_GC_MALL_SET",           # Dynamic
     "HEADER_GC_MALL_DEL",           # Dynamic
     "HEADER_GC_TIME_SYNC",          # Internal
-}
+})
 
 def header_to_struct_candidates(header_name):
     """Convert HEADER_CG_MOVE to potential struct names
@@ -262,46 +309,47 @@ def header_to_struct_candidates(header_name):
     Simple pattern: HEADER_CG_XXX -> TPacketCGXxx or SPacketCGXxx
     Uses alias mapping for non-standard names.
     """
-    candidates = []
-    
     # Check alias mapping first (for non-standard names)
-    if header_name in HEADER_STRUCT_ALIASES:
-        struct_name = HEADER_STRUCT_ALIASES[header_name]
-        candidates.append(struct_name)
+    struct_name = HEADER_STRUCT_ALIASES.get(header_name)
+    if struct_name is None:
+        alias_candidates = ()
+    elif struct_name.startswith("TPacket"):
         # Also add S variant if it's T
-        if struct_name.startswith("TPacket"):
-            candidates.append(struct_name.replace("TPacket", "SPacket", 1))
+        alias_candidates = (struct_name, struct_name.replace("TPacket", "SPacket", 1))
+    else:
+        alias_candidates = (struct_name,)
     
     if header_name.startswith("HEADER_CG_"):
         prefix = "CG"
-        suffix = header_name.replace("HEADER_CG_", "")
     elif header_name.startswith("HEADER_GC_"):
         prefix = "GC"
-        suffix = header_name.replace("HEADER_GC_", "")
     else:
-        return candidates
+        return alias_candidates
     
-    camel_suffix = convert_to_camelcase(suffix)
+    camel_suffix = convert_to_camelcase(header_name[len("HEADER_CG_"):])
     
     # Standard patterns (as fallback)
-    candidates.extend([
+    return alias_candidates + (
         f"TPacket{prefix}{camel_suffix}",  # TPacketCGMove
         f"SPacket{prefix}{camel_suffix}",  # SPacketCGMove
         f"TPacket{camel_suffix}",          # TPacketMove (without prefix)
         f"SPacket{camel_suffix}",          # SPacketMove
-    ])
-    
-    return candidates
+    )
+
+def resolve_header_structs(headers, structs):
+    """Map each header to the first candidate struct that exists in structs"""
+    resolved = {}
+    for header_name in headers:
+        found = next((c for c in header_to_struct_candidates(header_name) if c in structs), None)
+        if found:
+            resolved[header_name] = found
+    return resolved
 
 def generate_printer_function(struct_name, struct_info):
     """Generate a printer function for a struct"""
     fields = struct_info['fields']
-    lines = []
     func_name = f"Print_{struct_name}"
     
-    lines.append(f"inline void {func_name}(FILE* f, const void* data, int size) {{")
-    lines.append(f"    const {struct_name}& p = *(const {struct_name}*)data;")
-    
     format_parts = []
     args = []
     
@@ -311,15 +359,12 @@ def generate_printer_function(struct_name, struct_info):
         arr_size = field['array_size']
         arr_size2 = field['array_size2']
         
-        if fname.lower() in ['header', 'bheader', 'cheader']:
+        if fname.lower() in _HEADER_FIELD_NAMES:
             continue
         
-        if ftype.startswith('TPacket') or ftype.startswith('SPacket'):
+        if ftype.startswith(('TPacket', 'SPacket')):
             continue
-        if ftype in ['TItemPos', 'TQuickslot', 'TSimplePlayer', 'TPlayerSkill', 
-                     'TPlayerItemAttribute', 'TRefineMaterial', 'TEquipmentItemSet',
-                     'TPacketAffectElement', 'TShopItemData', 'packet_shop_item',
-                     'TLandPacketElement', 'TNPCPosition', 'TSubPacketShopTab']:
+        if ftype in _OPAQUE_STRUCT_TYPES:
             format_parts.append(f"{fname}=(struct)")
             continue
         
@@ -335,43 +380,51 @@ def generate_printer_function(struct_name, struct_info):
                 format_parts.append(f"{fname}=[{arr_size}]")
             continue
         
-        if ftype in TYPE_FORMAT:
-            fmt_spec, fmt_str = TYPE_FORMAT[ftype]
-            simple_fmt = fmt_str.replace("'", "")
-            format_parts.append(f"{fname}={simple_fmt}")
-            
-            if ftype == 'time_t':
-                args.append(f"(long long)p.{fname}")
-            else:
-                args.append(f"p.{fname}")
+        render = _TYPE_RENDER.get(ftype)
+        if render:
+            fmt, arg_template = render
+            format_parts.append(f"{fname}={fmt}")
+            args.append(arg_template.format(name=fname))
         else:
             format_parts.append(f"{fname}=%u")
             args.append(f"(unsigned)p.{fname}")
     
     if format_parts and args:
-        format_str = ' '.join(format_parts) + '\\n'
-        args_str = ', '.join(args)
-        lines.append(f'    fprintf(f, "{format_str}", {args_str});')
+        call = f'fprintf(f, "{" ".join(format_parts)}\\n", {", ".join(args)});'
     elif format_parts:
-        format_str = ' '.join(format_parts) + '\\n'
-        lines.append(f'    fprintf(f, "{format_str}");')
+        call = f'fprintf(f, "{" ".join(format_parts)}\\n");'
     else:
-        lines.append('    fprintf(f, "(header only)\\n");')
+        call = 'fprintf(f, "(header only)\\n");'
     
-    lines.append("}")
-    return '\n'.join(lines), func_name
+    code = (f"inline void {func_name}(FILE* f, const void* data, int size) {{\n"
+            f"    const {struct_name}& p = *(const {struct_name}*)data;\n"
+            f"    {call}\n"
+            "}")
+    return code, func_name
 
 def generate_short_name(header_name):
     """HEADER_CG_MOVE -> CG_MOVE"""
     return header_name.replace("HEADER_", "")
 
-def generate_output(headers, structs):
-    """Generate the PacketDebugRegGen.h file content"""
+def _printer_of(pkt):
+    """Printer function registered for a packet entry"""
+    if pkt['comment'] == 'header only':
+        return 'PrintHeaderOnly'
+    return pkt['printer'] or 'PrintHexDump'
+
+def _comment_of(pkt):
+    """Trailing C++ comment for a packet registration line"""
+    return f" // {pkt['comment']}" if pkt['comment'] else ""
+
+def generate_output(headers, structs, out):
+    """Write the PacketDebugRegGen.h file content to the open text stream out"""
     
     cg_packets = []
     gc_packets = []
     generated_printers = {}
     printer_code = []
+    # Structurally identical structs share one printer function
+    body_cache = {}
     
     # Stats
     stats = {
@@ -382,165 +435,166 @@ def generate_output(headers, structs):
     }
     
     # Known variable-size packets (contain wSize field)
-    variable_size_headers = set()
-    for sname, sinfo in structs.items():
-        for field in sinfo['fields']:
-            if field['name'] in ['size', 'wSize', 'Size'] and field['type'] in ['WORD', 'DWORD', 'uint16_t']:
-                variable_size_headers.add(sname)
-    
-    # Process each header
-    for header_name, header_value in sorted(headers.items(), key=lambda x: (x[0][:9], x[1])):
-        short_name = generate_short_name(header_name)
-        
-        found_struct = None
-        for candidate in header_to_struct_candidates(header_name):
-            if candidate in structs:
-                found_struct = candidate
-                break
-        
-        entry = {
-            'header': header_name,
-            'value': header_value,
-            'name': short_name,
-            'struct': found_struct,
-            'printer': None,
-            'comment': None
-        }
-        
-        if found_struct:
-            struct_info = structs[found_struct]
+    variable_size_headers = {
+        sname for sname, sinfo in structs.items()
+        if any(f['name'] in _SIZE_FIELD_NAMES and f['type'] in _SIZE_FIELD_TYPES
+               for f in sinfo['fields'])
+    }
+    
+    resolved = resolve_header_structs(headers, structs)
+    
+    # Process each header: CG first, then GC, each ordered by header value
+    items = headers.items()
+    cg_items = sorted(((k, v) for k, v in items if k.startswith("HEADER_CG_")), key=itemgetter(1))
+    gc_items = sorted(((k, v) for k, v in items if k.startswith("HEADER_GC_")), key=itemgetter(1))
+    
+    for header_items, packets in ((cg_items, cg_packets), (gc_items, gc_packets)):
+        for header_name, header_value in header_items:
+            short_name = generate_short_name(header_name)
             
-            if struct_info['header_only']:
-                entry['comment'] = 'header only'
-                stats['header_only'] += 1
-            elif found_struct in variable_size_headers:
-                entry['comment'] = 'variable size'
-                stats['variable_size'] += 1
-            else:
-                stats['with_struct'] += 1
+            found_struct = resolved.get(header_name)
             
-            if found_struct not in generated_printers:
-                code, func_name = generate_printer_function(found_struct, struct_info)
-                printer_code.append(code)
-                generated_printers[found_struct] = func_name
+            entry = {
+                'header': header_name,
+                'value': header_value,
+                'name': short_name,
+                'struct': found_struct,
+                'printer': None,
+                'comment': None
+            }
             
-            entry['printer'] = generated_printers[found_struct]
-        elif header_name in NO_STRUCT_PACKETS:
-            entry['comment'] = 'no struct (dynamic/deprecated)'
-            stats['no_struct'] += 1
-        else:
-            entry['comment'] = 'no struct found'
-            stats['no_struct'] += 1
-        
-        if header_name.startswith("HEADER_CG_"):
-            cg_packets.append(entry)
-        else:
-            gc_packets.append(entry)
+            if found_struct:
+                struct_info = structs[found_struct]
+                
+                if struct_info['header_only']:
+                    entry['comment'] = 'header only'
+                    stats['header_only'] += 1
+                elif found_struct in variable_size_headers:
+                    entry['comment'] = 'variable size'
+                    stats['variable_size'] += 1
+                else:
+                    stats['with_struct'] += 1
+                
+                if found_struct not in generated_printers:
+                    # Keyed on the normalized body: it fixes both the parsed fields
+                    # and the layout (skipped pointer/union members included)
+                    key = struct_info['body']
+                    if key in body_cache:
+                        generated_printers[found_struct] = body_cache[key]
+                    else:
+                        code, func_name = generate_printer_function(found_struct, struct_info)
+                        printer_code.append(code)
+                        generated_printers[found_struct] = func_name
+                        body_cache[key] = func_name
+                
+                entry['printer'] = generated_printers[found_struct]
+            elif header_name in NO_STRUCT_PACKETS:
+                entry['comment'] = 'no struct (dynamic/deprecated)'
+                stats['no_struct'] += 1
+            else:
+                entry['comment'] = 'no struct found'
+                stats['no_struct'] += 1
+            
+            packets.append(entry)
     
     # Generate the file
-    lines = []
-    lines.append("#pragma once")
-    lines.append("/**")
-    lines.append(" * @file PacketDebugRegGen.h")
-    lines.append(" * @brief AUTO-GENERATED - Do not edit manually!")
-    lines.append(" * ")
-    lines.append(" * Generated by: generate_packet_debug.py")
-    lines.append(" * Re-run the script after modifying packet.h")
-    lines.append(" *")
-    lines.append(f" * Stats: {stats['with_struct']} with struct, {stats['header_only']} header-only,")
-    lines.append(f" *        {stats['variable_size']} variable-size, {stats['no_struct']} no struct found")
-    lines.append(" */")
-    lines.append("")
-    lines.append("#ifndef __PACKET_DEBUG_REG_GEN_H__")
-    lines.append("#define __PACKET_DEBUG_REG_GEN_H__")
-    lines.append("")
-    lines.append("#include \"../../Lead-Shared-Source/packet.h\"")
-    lines.append("")
+    w = out.write
+    w("#pragma once\n")
+    w("/**\n")
+    w(" * @file PacketDebugRegGen.h\n")
+    w(" * @brief AUTO-GENERATED - Do not edit manually!\n")
+    w(" * \n")
+    w(" * Generated by: generate_packet_debug.py\n")
+    w(" * Re-run the script after modifying packet.h\n")
+    w(" *\n")
+    w(f" * Stats: {stats['with_struct']} with struct, {stats['header_only']} header-only,\n")
+    w(f" *        {stats['variable_size']} variable-size, {stats['no_struct']} no struct found\n")
+    w(" */\n")
+    w("\n")
+    w("#ifndef __PACKET_DEBUG_REG_GEN_H__\n")
+    w("#define __PACKET_DEBUG_REG_GEN_H__\n")
+    w("\n")
+    w("#include \"../../Lead-Shared-Source/packet.h\"\n")
+    w("\n")
     
     # Fallback printers
-    lines.append("//=============================================================================")
-    lines.append("// Fallback Printers")
-    lines.append("//=============================================================================")
-    lines.append("inline void PrintHexDump(FILE* f, const void* data, int size) {")
-    lines.append("    if (size <= 1) { fprintf(f, \"(empty)\\n\"); return; }")
-    lines.append("    const BYTE* bytes = (const BYTE*)data;")
-    lines.append("    int maxBytes = (size - 1 > 24) ? 24 : size - 1;")
-    lines.append("    for (int i = 1; i <= maxBytes; i++) fprintf(f, \"%02X \", bytes[i]);")
-    lines.append("    if (size - 1 > 24) fprintf(f, \"...\");")
-    lines.append("    fprintf(f, \"\\n\");")
-    lines.append("}")
-    lines.append("")
-    lines.append("inline void PrintHeaderOnly(FILE* f, const void* data, int size) {")
-    lines.append("    fprintf(f, \"(header only)\\n\");")
-    lines.append("}")
-    lines.append("")
+    w("//=============================================================================\n")
+    w("// Fallback Printers\n")
+    w("//=============================================================================\n")
+    w("inline void PrintHexDump(FILE* f, const void* data, int size) {\n")
+    w("    if (size <= 1) { fprintf(f, \"(empty)\\n\"); return; }\n")
+    w("    const BYTE* bytes = (const BYTE*)data;\n")
+    w("    int maxBytes = (size - 1 > 24) ? 24 : size - 1;\n")
+    w("    for (int i = 1; i <= maxBytes; i++) fprintf(f, \"%02X \", bytes[i]);\n")
+    w("    if (size - 1 > 24) fprintf(f, \"...\");\n")
+    w("    fprintf(f, \"\\n\");\n")
+    w("}\n")
+    w("\n")
+    w("inline void PrintHeaderOnly(FILE* f, const void* data, int size) {\n")
+    w("    fprintf(f, \"(header only)\\n\");\n")
+    w("}\n")
+    w("\n")
     
     # Generated printers
-    lines.append("//=============================================================================")
-    lines.append(f"// Auto-Generated Printer Functions ({len(printer_code)} structs)")
-    lines.append("//=============================================================================")
+    w("//=============================================================================\n")
+    w(f"// Auto-Generated Printer Functions ({len(generated_printers)} structs)\n")
+    w("//=============================================================================\n")
     for code in printer_code:
-        lines.append(code)
-        lines.append("")
+        w(code)
+        w("\n\n")
     
     # Registration
-    lines.append("//=============================================================================")
-    lines.append("// Auto Registration")
-    lines.append("//=============================================================================")
-    lines.append("inline void RegisterAllPacketsGenerated()")
-    lines.append("{")
-    lines.append("    auto& dbg = CPacketDebug::Instance();")
-    lines.append("")
-    lines.append("    //-------------------------------------------------------------------------")
-    lines.append(f"    // Client -> Server (CG) - {len(cg_packets)} packets")
-    lines.append("    //-------------------------------------------------------------------------")
-    
-    for pkt in cg_packets:
-        if pkt['comment'] == 'header only':
-            printer = 'PrintHeaderOnly'
-        elif pkt['printer']:
-            printer = pkt['printer']
-        else:
-            printer = 'PrintHexDump'
-        
-        comment = f" // {pkt['comment']}" if pkt['comment'] else ""
-        lines.append(f"    dbg.RegSend({pkt['header']}, \"{pkt['name']}\", {printer});{comment}")
-    
-    lines.append("")
-    lines.append("    //-------------------------------------------------------------------------")
-    lines.append(f"    // Server -> Client (GC) - {len(gc_packets)} packets")
-    lines.append("    //-------------------------------------------------------------------------")
-    
-    for pkt in gc_packets:
-        if pkt['comment'] == 'header only':
-            printer = 'PrintHeaderOnly'
-        elif pkt['printer']:
-            printer = pkt['printer']
-        else:
-            printer = 'PrintHexDump'
-        
-        comment = f" // {pkt['comment']}" if pkt['comment'] else ""
-        lines.append(f"    dbg.RegRecv({pkt['header']}, \"{pkt['name']}\", {printer});{comment}")
-    
-    lines.append("}")
-    lines.append("")
-    lines.append("#endif // __PACKET_DEBUG_REG_GEN_H__")
-    lines.append("")
-    
-    return "\n".join(lines)
+    w("//=============================================================================\n")
+    w("// Auto Registration\n")
+    w("//=============================================================================\n")
+    w("inline void RegisterAllPacketsGenerated()\n")
+    w("{\n")
+    w("    auto& dbg = CPacketDebug::Instance();\n")
+    w("\n")
+    w("    //-------------------------------------------------------------------------\n")
+    w(f"    // Client -> Server (CG) - {len(cg_packets)} packets\n")
+    w("    //-------------------------------------------------------------------------\n")
+    
+    w(''.join(
+        f"    dbg.RegSend({p['header']}, \"{p['name']}\", {_printer_of(p)});{_comment_of(p)}\n"
+        for p in cg_packets))
+    
+    w("\n")
+    w("    //-------------------------------------------------------------------------\n")
+    w(f"    // Server -> Client (GC) - {len(gc_packets)} packets\n")
+    w("    //-------------------------------------------------------------------------\n")
+    
+    w(''.join(
+        f"    dbg.RegRecv({p['header']}, \"{p['name']}\", {_printer_of(p)});{_comment_of(p)}\n"
+        for p in gc_packets))
+    
+    w("}\n")
+    w("\n")
+    w("#endif // __PACKET_DEBUG_REG_GEN_H__\n")
 
-def main():
-    print(f"Reading: {PACKET_H_PATH}")
-    
-    if not os.path.exists(PACKET_H_PATH):
-        print(f"ERROR: {PACKET_H_PATH} not found!")
+def main(packet_h_path=None, output_path=None):
+    # Resolve default paths here so importing the module touches no files
+    if packet_h_path is None or output_path is None:
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        if packet_h_path is None:
+            packet_h_path = os.path.join(script_dir, "..", "..", "Lead-Shared-Source", "packet.h")
+        if output_path is None:
+            output_path = os.path.join(script_dir, "PacketDebugRegGen.h")
+    
+    print(f"Reading: {packet_h_path}")
+    
+    if not os.path.exists(packet_h_path):
+        print(f"ERROR: {packet_h_path} not found!")
         return 1
     
-    with open(PACKET_H_PATH, 'r', encoding='utf-8', errors='ignore') as f:
+    with open(packet_h_path, 'r', encoding='utf-8', errors='ignore') as f:
         content = f.read()
     
-    headers = parse_packet_headers(content)
-    structs = parse_packet_structs(content)
+    # Strip comments once and share the cleaned buffer between both passes
+    cleaned = _strip_comments(content)
+    
+    headers = parse_packet_headers(cleaned)
+    structs = parse_packet_structs(cleaned)
     
     print(f"Found {len(headers)} packet headers")
     print(f"Found {len(structs)} packet structs")
@@ -550,12 +604,19 @@ def main():
     print(f"  CG (Client->Server): {cg_count}")
     print(f"  GC (Server->Client): {gc_count}")
     
-    output = generate_output(headers, structs)
-    
-    with open(OUTPUT_PATH, 'w', encoding='utf-8') as f:
-        f.write(output)
-    
-    print(f"\nGenerated: {OUTPUT_PATH}")
+    # Stream into a temp file next to the output and swap it in only on
+    # success, so a failed run never leaves a truncated header behind
+    tmp_path = output_path + ".tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+            generate_output(headers, structs, f)
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    
+    print(f"\nGenerated: {output_path}")
     print("Done!")
     return 0
 
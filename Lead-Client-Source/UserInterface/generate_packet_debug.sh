@@ -0,0 +1,4 @@
+#!/bin/sh
+# Runs generate_packet_debug.py, preferring PyPy when available.
+# Override the interpreter with PYPY3=/path/to/interpreter.
+exec "${PYPY3:-$(command -v pypy3 || echo python3)}" "$(dirname "$0")/generate_packet_debug.py" "$@"